@@ -29,24 +29,36 @@ Integracja z OpenAI:
 - Model domyślny: gpt-4o-mini (możesz zmienić w kodzie)
 
 Instalacja:
-    pip install PySide6 openai
+    pip install PySide6 openai orjson
 
 Uruchom:
     python ai_dev_studio.py
 """
 from __future__ import annotations
-import json
+import asyncio
+import hashlib
 import os
+import re
 import sys
+import threading
 import traceback
 from dataclasses import dataclass
+from html import escape
 from pathlib import Path
-from typing import List, Optional, Literal
+from typing import Callable, List, Optional, Literal
 
+import orjson
 from PySide6 import QtCore, QtGui, QtWidgets
 
 APP_NAME = "AI Dev Studio"
 MODEL_NAME = os.getenv("AI_MODEL", "gpt-4o-mini")
+HIGHLIGHT_MAX_CHARS = 500_000  # powyżej – plik bez kolorowania składni
+NO_UNDO_BYTES = 8 << 20        # powyżej – edytor bez historii undo/redo
+CACHE_FILE = ".aistudio_cache.json"  # w katalogu projektu: prompt -> plan
+CACHE_MAX_ENTRIES = 50         # najstarsze plany wypadają z cache
+AI_MAX_CONCURRENCY = 8         # ile zapytań z jednej paczki leci naraz
+# linia zawierająca tylko "---" rozdziela kilka zadań w jednym prompcie
+BATCH_SEP_RE = re.compile(r"^[ \t]*---[ \t]*$", re.MULTILINE)
 
 # -----------------------------
 # Typy i narzędzia
@@ -71,41 +83,102 @@ def clamp_to_root(p: Path) -> Path:
     Chroni przed zapisami poza projektem.
     """
     assert SAFE_ROOT is not None, "SAFE_ROOT not set"
-    p = (SAFE_ROOT / p).resolve()
-    if SAFE_ROOT not in p.parents and p != SAFE_ROOT:
-        raise ValueError(f"Ścieżka poza projektem: {p}")
-    return p
+    # zawsze realpath – dowiązanie w projekcie (np. link -> /etc) też nie może wyprowadzić poza
+    resolved = os.path.realpath(SAFE_ROOT / p)
+    root = str(SAFE_ROOT)
+    if resolved != root and not resolved.startswith(os.path.join(root, "")):
+        raise ValueError(f"Ścieżka poza projektem: {resolved}")
+    return Path(resolved)
+
+def head_lines(text: str, n: int) -> str:
+    """Pierwsze n linii tekstu – bez dzielenia całej treści na listę linii."""
+    end = -1
+    for _ in range(n):
+        end = text.find("\n", end + 1)
+        if end < 0:
+            return text
+    return text[:end]
+
+def write_file(path: Path, data: bytes) -> None:
+    """Zapisuje bajty jednym open/write – bez warstwy io/pathlib."""
+    # O_BINARY: na Windows os.open domyślnie tłumaczy \n -> \r\n
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+    fd = os.open(path, flags, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
 
 # -----------------------------
 # Prosty highlighter Pythona
 # -----------------------------
+PY_KEYWORDS = (
+    "and|as|assert|break|class|continue|def|del|elif|else|except|False|finally|for|from|global"
+    "|if|import|in|is|lambda|None|nonlocal|not|or|pass|raise|return|True|try|while|with|yield"
+)
+# Jedna alternatywa zamiast pięciu osobnych wzorców – każda linia skanowana raz;
+# nazwa grupy wybiera format. Teksty i komentarze pochłaniają to, co w środku.
+_TOKEN_RE = re.compile(
+    rf"(?P<kw>\b(?:{PY_KEYWORDS})\b)"
+    r"|(?P<str>'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\")"
+    r"|(?P<com>#.*$)"
+    r"|(?P<num>\b[0-9]+(?:\.[0-9]+)?\b)"
+)
+_NON_BMP_RE = re.compile("[\U00010000-\U0010FFFF]")
+
+def _utf16_pos(text: str, i: int) -> int:
+    """Pozycja znaku w jednostkach UTF-16 (tak liczy QTextBlock)."""
+    return len(text[:i].encode('utf-16-le')) // 2
+
 class PythonHighlighter(QtGui.QSyntaxHighlighter):
+    """Kolorowanie linia po linii, bez stanu między blokami.
+
+    Przy edycji QSyntaxHighlighter przelicza tylko bloki z zakresu
+    contentsChange, a do następnego bloku przechodzi jedynie wtedy, gdy
+    zmienił się userState. Dlatego nie używamy setCurrentBlockState
+    (np. dla wieloliniowych stringów) – każda edycja koloruje tylko
+    zmienione linie, a nie resztę dokumentu.
+    """
+    # Formaty budowane raz na klasę (przy pierwszym edytorze – QTextCharFormat
+    # wymaga działającej aplikacji Qt), a nie przy każdej otwartej zakładce.
+    _formats: dict[str, QtGui.QTextCharFormat] | None = None
+
     def __init__(self, parent):
         super().__init__(parent)
-        self.rules = []
+        if PythonHighlighter._formats is None:
+            PythonHighlighter._formats = self._build_formats()
 
-        def add(pattern: str, color: str, bold=False, italic=False):
-            fmt = QtGui.QTextCharFormat()
+    @staticmethod
+    def _build_formats() -> dict[str, QtGui.QTextCharFormat]:
+        def fmt(color: str, bold=False, italic=False) -> QtGui.QTextCharFormat:
+            f = QtGui.QTextCharFormat()
             if bold:
-                fmt.setFontWeight(QtGui.QFont.Weight.Bold)
+                f.setFontWeight(QtGui.QFont.Weight.Bold)
             if italic:
-                fmt.setFontItalic(True)
-            fmt.setForeground(QtGui.QColor(color))
-            self.rules.append((QtCore.QRegularExpression(pattern), fmt))
+                f.setFontItalic(True)
+            f.setForeground(QtGui.QColor(color))
+            return f
 
-        kws = r"\b(and|as|assert|break|class|continue|def|del|elif|else|except|False|finally|for|from|global|if|import|in|is|lambda|None|nonlocal|not|or|pass|raise|return|True|try|while|with|yield)\b"
-        add(kws, "#5c6bc0", bold=True)
-        add(r"'(?:[^'\\]|\\.)*'", "#7cb342")
-        add(r'"(?:[^"\\]|\\.)*"', "#7cb342")
-        add(r"#.*$", "#9e9e9e", italic=True)
-        add(r"\b[0-9]+(\.[0-9]+)?\b", "#e67e22")
+        return {
+            "kw": fmt("#5c6bc0", bold=True),
+            "str": fmt("#7cb342"),
+            "com": fmt("#9e9e9e", italic=True),
+            "num": fmt("#e67e22"),
+        }
 
     def highlightBlock(self, text: str) -> None:
-        for pattern, form in self.rules:
-            it = pattern.globalMatch(text)
-            while it.hasNext():
-                m = it.next()
-                self.setFormat(m.capturedStart(), m.capturedLength(), form)
+        if not text.strip():
+            return
+        formats = type(self)._formats
+        # znaki spoza BMP (np. emoji) to w Qt dwie jednostki – przeliczamy pozycje
+        wide = _NON_BMP_RE.search(text) is not None
+        for m in _TOKEN_RE.finditer(text):
+            start, end = m.span()
+            if wide:
+                start, end = _utf16_pos(text, start), _utf16_pos(text, end)
+            self.setFormat(start, end - start, formats[m.lastgroup])
 
 # -----------------------------
 # Editor widget
@@ -129,17 +202,33 @@ class Editor(QtWidgets.QPlainTextEdit):
         return self._dirty
 
     def _on_change(self):
+        # wystarczy pierwsza zmiana – do zapisu sygnał zostaje odpięty,
+        # żeby nie wołać Pythona przy każdym znaku
         self._dirty = True
+        self.textChanged.disconnect(self._on_change)
+
+    def _mark_clean(self):
+        if self._dirty:
+            self._dirty = False
+            self.textChanged.connect(self._on_change)
 
     def load(self, path: Path):
         try:
+            size = Path(path).stat().st_size
             txt = Path(path).read_text(encoding='utf-8')
         except Exception as e:
             QtWidgets.QMessageBox.critical(self, APP_NAME, f"Nie mogę otworzyć {path}:\n{e}")
             return
+        # historia undo dla wielu MB tekstu to druga kopia dokumentu
+        self.setUndoRedoEnabled(size <= NO_UNDO_BYTES)
+        # highlighter odpięty na czas setPlainText, potem jedno pełne kolorowanie
+        # gotowego dokumentu; duże pliki bez kolorowania – zamraża UI
+        self.highlighter.setDocument(None)
         self.setPlainText(txt)
+        if len(txt) <= HIGHLIGHT_MAX_CHARS:
+            self.highlighter.setDocument(self.document())
         self._path = Path(path)
-        self._dirty = False
+        self._mark_clean()
 
     def save(self, to_path: Optional[Path] = None) -> bool:
         if to_path is not None:
@@ -149,17 +238,125 @@ class Editor(QtWidgets.QPlainTextEdit):
         try:
             self._path.parent.mkdir(parents=True, exist_ok=True)
             self._path.write_text(self.toPlainText(), encoding='utf-8')
-            self._dirty = False
+            self._mark_clean()
             return True
         except Exception as e:
             QtWidgets.QMessageBox.critical(self, APP_NAME, f"Nie mogę zapisać {self._path}:\n{e}")
             return False
 
+# -----------------------------
+# Klient AI (asyncio w osobnym wątku)
+# -----------------------------
+SYSTEM_MSG = (
+    "Jesteś asystentem w edytorze kodu. Zwracaj WYŁĄCZNIE poprawny JSON w formacie:\n"
+    "{\n  \"changes\": [ {\"op\":\"create|update|delete\", \"path\":\"...\", \"content\":\"...opcjonalnie...\"} ],\n  \"notes\": \"krótko\"\n}\n"
+    "Reguły: ścieżki względne względem katalogu projektu; unikanie \"..\"; dla update podaj CAŁĄ zawartość pliku po zmianach;"
+    " możesz tworzyć .py, .html, .css, .js, itp. Jeżeli prosisz o kilka plików – dodaj kilka obiektów changes."
+)
+
+_ai_loop: asyncio.AbstractEventLoop | None = None
+_ai_client = None  # AsyncOpenAI, tworzony leniwie w wątku pętli
+_ai_client_lock = threading.Lock()
+
+def _get_ai_loop() -> asyncio.AbstractEventLoop:
+    """Zwraca jedną, współdzieloną pętlę asyncio działającą w wątku w tle."""
+    global _ai_loop
+    if _ai_loop is None:
+        _ai_loop = asyncio.new_event_loop()
+        threading.Thread(target=_ai_loop.run_forever, name="ai-loop", daemon=True).start()
+    return _ai_loop
+
+def _get_ai_client():
+    """Jeden klient AsyncOpenAI na aplikację (pula połączeń jest współdzielona)."""
+    global _ai_client
+    if _ai_client is None:
+        with _ai_client_lock:
+            if _ai_client is None:
+                api_key = os.getenv("OPENAI_API_KEY")
+                if not api_key:
+                    raise RuntimeError("Brak OPENAI_API_KEY w środowisku. Ustaw i wyłącz tryb offline.")
+                import httpx
+                from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+                # keep-alive: kolejne prompty nie płacą za nowy handshake TCP+TLS
+                limits = httpx.Limits(max_connections=20, max_keepalive_connections=10)
+                _ai_client = AsyncOpenAI(api_key=api_key, http_client=DefaultAsyncHttpxClient(limits=limits))
+    return _ai_client
+
+def _preload_ai():
+    """Importuje openai (httpx, pydantic, …) w tle, żeby pierwsze „Wyślij do AI”
+    nie czekało na zimny import.
+    """
+    try:
+        import openai  # noqa: F401
+    except ImportError:
+        pass  # brak pakietu zgłosi _get_ai_client przy pierwszym zapytaniu
+
+async def call_ai(user_msg: str, on_chunk: Optional[Callable[[str], None]] = None) -> str:
+    """Wysyła jeden prompt do modelu i zwraca surową odpowiedź (JSON planu).
+    Z on_chunk odpowiedź jest strumieniowana: każdy kawałek trafia do on_chunk
+    od razu, a całość i tak jest zwracana na końcu.
+    """
+    request = dict(
+        model=MODEL_NAME,
+        temperature=0.2,
+        messages=[
+            {"role": "system", "content": SYSTEM_MSG},
+            {"role": "user", "content": user_msg},
+        ],
+        max_tokens=4096,
+    )
+    if on_chunk is None:
+        resp = await _get_ai_client().chat.completions.create(**request)
+        # content bywa None (np. odmowa / filtr treści) – dalej zawsze str
+        return resp.choices[0].message.content or ""
+    parts = []
+    stream = await _get_ai_client().chat.completions.create(**request, stream=True)
+    async for event in stream:
+        if event.choices and (delta := event.choices[0].delta.content):
+            parts.append(delta)
+            on_chunk(delta)
+    return "".join(parts)
+
+async def run_batch(prompts: list[str]) -> list[str | BaseException]:
+    """Wysyła prompty równolegle (najwyżej AI_MAX_CONCURRENCY naraz) i zwraca
+    odpowiedzi w kolejności promptów. Nieudane zapytanie daje wyjątek na swojej
+    pozycji – pozostałe wyniki nie przepadają.
+    """
+    sem = asyncio.Semaphore(AI_MAX_CONCURRENCY)
+
+    async def one(user_msg: str) -> str:
+        async with sem:
+            return await call_ai(user_msg)
+
+    return await asyncio.gather(*(one(p) for p in prompts), return_exceptions=True)
+
+def check_plan(plan) -> None:
+    """Rzuca ValueError, jeśli plan nie ma kształtu, którego oczekuje merge_plans."""
+    if not isinstance(plan, dict):
+        raise ValueError("oczekiwano obiektu JSON")
+    if not isinstance(plan.get('changes', []), list):
+        raise ValueError("'changes' musi być listą")
+    if not isinstance(plan.get('notes', ""), str):
+        raise ValueError("'notes' musi być tekstem")
+
+def merge_plans(plans: list[dict]) -> dict:
+    """Skleja plany z kilku odpowiedzi w jeden (zmiany po kolei, notatki razem)."""
+    if len(plans) == 1:
+        return plans[0]
+    return {
+        "changes": [c for plan in plans for c in plan.get('changes', [])],
+        "notes": "\n".join(n for plan in plans if (n := plan.get('notes'))),
+    }
+
 # -----------------------------
 # Chat + AI
 # -----------------------------
 class ChatPanel(QtWidgets.QWidget):
     ai_response_ready = QtCore.Signal(dict)
+    # id strumienia (-1 = bez strumieniowania) + dane; emitowane z wątku pętli
+    _chunk_received = QtCore.Signal(int, str)
+    _plans_received = QtCore.Signal(int, list, list, list)  # klucze cache, JSON-y planów, błędy ("" = OK)
+    _error_received = QtCore.Signal(int, str)
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -172,28 +369,86 @@ class ChatPanel(QtWidgets.QWidget):
         self.offline_chk = QtWidgets.QCheckBox("Tryb offline (echo)")
         self.offline_chk.setChecked(True)
         title.addWidget(self.offline_chk)
+        # plan z cache ma treść plików z chwili generowania – po edycji wyłącz
+        self.cache_chk = QtWidgets.QCheckBox("Użyj cache")
+        self.cache_chk.setChecked(True)
+        title.addWidget(self.cache_chk)
         title.addStretch(1)
 
         self.history = QtWidgets.QTextEdit(readOnly=True)
         self.layout().addWidget(self.history)
 
         row = QtWidgets.QHBoxLayout()
-        self.prompt = QtWidgets.QLineEdit()
-        self.prompt.setPlaceholderText("Opisz co ma powstać / co zmienić (np. utwórz index.html, style.css, app.py)…")
+        # wieloliniowe pole: kilka zadań rozdziela osobna linia "---"
+        self.prompt = QtWidgets.QPlainTextEdit()
+        self.prompt.setPlaceholderText("Opisz co ma powstać / co zmienić (np. utwórz index.html, style.css, app.py)…\n"
+                                       "Kilka zadań naraz: rozdziel je linią ---")
+        self.prompt.setMaximumHeight(5 * self.prompt.fontMetrics().lineSpacing())
         self.send_btn = QtWidgets.QPushButton("Wyślij do AI")
+        self.send_btn.setToolTip("Ctrl+Enter")
         row.addWidget(self.prompt, 1)
         row.addWidget(self.send_btn)
         self.layout().addLayout(row)
 
         self.send_btn.clicked.connect(self.on_send)
-        self.prompt.returnPressed.connect(self.on_send)
+        send_sc = QtGui.QShortcut(QtGui.QKeySequence("Ctrl+Return"), self.prompt)
+        send_sc.setContext(QtCore.Qt.ShortcutContext.WidgetShortcut)  # tylko z pola promptu
+        send_sc.activated.connect(self.on_send)
+        self._chunk_received.connect(self._on_ai_chunk)
+        self._plans_received.connect(self._on_ai_plans)
+        self._error_received.connect(self._on_ai_error)
+
+        # odpowiedzi w trakcie strumieniowania: id -> ostatni blok ich wpisu
+        # (blok, nie kursor – kursor na końcu dokumentu „ucieka” przy append)
+        self._streams: dict[int, QtGui.QTextBlock] = {}
+        self._next_stream_id = 0
+
+        # plany z AI po skrócie promptu – powtórzony prompt nie idzie do sieci
+        self._cache: dict[str, dict] = {}
+        self._cache_path: Optional[Path] = None
+
+    @staticmethod
+    def _cache_key(user_msg: str) -> str:
+        return hashlib.blake2b(f"{MODEL_NAME}\0{user_msg}".encode('utf-8')).hexdigest()
+
+    def load_cache(self, root: Path):
+        """Wczytuje cache planów z katalogu projektu (zapisuje poprzedni)."""
+        self.save_cache()
+        self._cache_path = root / CACHE_FILE
+        try:
+            cache = orjson.loads(self._cache_path.read_bytes())
+        except (OSError, ValueError):
+            cache = None
+        self._cache = {}
+        if isinstance(cache, dict):
+            for key, plan in cache.items():
+                try:
+                    check_plan(plan)  # plik mógł być edytowany ręcznie
+                except ValueError:
+                    continue
+                self._cache_put(key, plan)
+
+    def _cache_put(self, key: str, plan: dict):
+        # dict trzyma kolejność wstawiania – na końcu najświeższe
+        self._cache.pop(key, None)
+        self._cache[key] = plan
+        while len(self._cache) > CACHE_MAX_ENTRIES:
+            del self._cache[next(iter(self._cache))]
+
+    def save_cache(self):
+        if self._cache_path is None or not self._cache:
+            return
+        try:
+            self._cache_path.write_bytes(orjson.dumps(self._cache))
+        except OSError:
+            pass  # cache to tylko optymalizacja
 
     def append(self, who: str, text: str):
-        esc = QtGui.QTextDocument().toHtmlEscaped(text)
+        esc = escape(text, quote=False).replace("\n", "<br>")
         self.history.append(f"<b>{who}:</b> {esc}")
 
     def on_send(self):
-        msg = self.prompt.text().strip()
+        msg = self.prompt.toPlainText().strip()
         if not msg:
             return
         self.append("Ty", msg)
@@ -206,66 +461,86 @@ class ChatPanel(QtWidgets.QWidget):
                 ],
                 "notes": "Tryb offline: tylko przykład tworzenia README.md"
             }
-            self.append("AI", json.dumps(plan, ensure_ascii=False, indent=2))
+            self.append("AI", orjson.dumps(plan, option=orjson.OPT_INDENT_2).decode())
+            self.ai_response_ready.emit(plan)
+            return
+        # kilka zadań rozdzielonych linią "---" leci do AI równolegle, wynik to jeden plan
+        prompts = [p.strip() for p in BATCH_SEP_RE.split(msg) if p.strip()]
+        if not prompts:
+            return
+        keys = [self._cache_key(p) for p in prompts]
+        cached = [self._cache.get(k) for k in keys]
+        if self.cache_chk.isChecked() and all(plan is not None for plan in cached):
+            for key, plan in zip(keys, cached):
+                self._cache_put(key, plan)  # trafienie = świeży wpis
+            plan = merge_plans(cached)
+            self.append("AI", "(z pamięci podręcznej)\n" + orjson.dumps(plan, option=orjson.OPT_INDENT_2).decode())
             self.ai_response_ready.emit(plan)
         else:
-            self.call_openai(msg)
-
-    def call_openai(self, user_msg: str):
-        # Uruchom w wątku, żeby UI nie zawisł
-        worker = AIWorker(user_msg)
-        worker.finished_plan.connect(self._on_ai_plan)
-        worker.error_signal.connect(self._on_ai_error)
-        worker.start()
-
-    def _on_ai_plan(self, plan_json: str):
-        self.append("AI", plan_json)
+            self.call_openai(prompts)
+
+    def call_openai(self, prompts: list[str]):
+        # Pojedynczy prompt jest strumieniowany do historii na bieżąco;
+        # paczka (kilka naraz) pokazuje się dopiero w całości
+        stream_id = -1
+        if len(prompts) == 1:
+            stream_id = self._next_stream_id
+            self._next_stream_id += 1
+            self.append("AI", "")
+            self._streams[stream_id] = self.history.document().lastBlock()
+        # Korutyna leci na pętli asyncio w tle, żeby UI nie zawisł
+        asyncio.run_coroutine_threadsafe(self._call_ai(prompts, stream_id), _get_ai_loop())
+
+    async def _call_ai(self, prompts: list[str], stream_id: int):
+        # Działa w wątku pętli – wynik wraca do UI przez sygnały (queued)
         try:
-            plan = json.loads(plan_json)
-            self.ai_response_ready.emit(plan)
+            if stream_id >= 0:
+                on_chunk = lambda delta: self._chunk_received.emit(stream_id, delta)
+                results = [await call_ai(prompts[0], on_chunk)]
+            else:
+                results = await run_batch(prompts)
         except Exception as e:
-            self.append("AI", f"Błąd parsowania JSON: {e}")
-
-    def _on_ai_error(self, err: str):
+            self._error_received.emit(stream_id, f"{type(e).__name__}: {e}\n{traceback.format_exc()}")
+        else:
+            # wyjątki nie przechodzą przez sygnał Qt – zamieniamy na tekst
+            contents = [r if isinstance(r, str) else "" for r in results]
+            errors = ["" if isinstance(r, str) else f"{type(r).__name__}: {r}" for r in results]
+            self._plans_received.emit(stream_id, [self._cache_key(p) for p in prompts], contents, errors)
+
+    def _on_ai_chunk(self, stream_id: int, delta: str):
+        block = self._streams.get(stream_id)
+        if block is None:
+            return
+        cursor = QtGui.QTextCursor(block)
+        cursor.movePosition(QtGui.QTextCursor.MoveOperation.EndOfBlock)
+        cursor.insertText(delta, QtGui.QTextCharFormat())  # bez pogrubienia „AI:”
+        self._streams[stream_id] = cursor.block()
+
+    def _on_ai_plans(self, stream_id: int, keys: list, contents: list, errors: list):
+        # odpowiedź strumieniowana jest już w historii – parsujemy tylko całość
+        streamed = self._streams.pop(stream_id, None) is not None
+        plans = []
+        for key, plan_json, err in zip(keys, contents, errors):
+            if err:
+                self.append("AI", f"Błąd AI: {err}")
+                continue
+            if not streamed:
+                self.append("AI", plan_json)
+            try:
+                plan = orjson.loads(plan_json)
+                check_plan(plan)
+            except Exception as e:
+                self.append("AI", f"Błąd parsowania JSON: {e}")
+                continue
+            self._cache_put(key, plan)
+            plans.append(plan)
+        if plans:
+            self.ai_response_ready.emit(merge_plans(plans))
+
+    def _on_ai_error(self, stream_id: int, err: str):
+        self._streams.pop(stream_id, None)
         self.append("AI", f"Błąd AI: {err}")
 
-class AIWorker(QtCore.QThread):
-    finished_plan = QtCore.Signal(str)
-    error_signal = QtCore.Signal(str)
-
-    def __init__(self, user_msg: str):
-        super().__init__()
-        self.user_msg = user_msg
-
-    def run(self):
-        try:
-            api_key = os.getenv("OPENAI_API_KEY")
-            if not api_key:
-                raise RuntimeError("Brak OPENAI_API_KEY w środowisku. Ustaw i wyłącz tryb offline.")
-            from openai import OpenAI
-            client = OpenAI(api_key=api_key)
-
-            system_msg = (
-                "Jesteś asystentem w edytorze kodu. Zwracaj WYŁĄCZNIE poprawny JSON w formacie:\n"
-                "{\n  \"changes\": [ {\"op\":\"create|update|delete\", \"path\":\"...\", \"content\":\"...opcjonalnie...\"} ],\n  \"notes\": \"krótko\"\n}\n"
-                "Reguły: ścieżki względne względem katalogu projektu; unikanie \"..\"; dla update podaj CAŁĄ zawartość pliku po zmianach;"
-                " możesz tworzyć .py, .html, .css, .js, itp. Jeżeli prosisz o kilka plików – dodaj kilka obiektów changes."
-            )
-
-            resp = client.chat.completions.create(
-                model=MODEL_NAME,
-                temperature=0.2,
-                messages=[
-                    {"role": "system", "content": system_msg},
-                    {"role": "user", "content": self.user_msg},
-                ],
-                max_tokens=4096,
-            )
-            content = resp.choices[0].message.content
-            self.finished_plan.emit(content)
-        except Exception as e:
-            self.error_signal.emit(f"{type(e).__name__}: {e}\n{traceback.format_exc()}")
-
 # -----------------------------
 # Podgląd i zastosowanie zmian
 # -----------------------------
@@ -300,16 +575,23 @@ class PlanView(QtWidgets.QWidget):
         self.tree.clear()
         if not self._plan:
             return
+        items = []
         for ch in self._plan.changes:
             item = QtWidgets.QTreeWidgetItem([ch.op, ch.path, "przygotowane"])
-            self.tree.addTopLevelItem(item)
             # pokaz podgląd treści (pierwsze 40 linii)
             if ch.content is not None:
-                preview = "\n".join(ch.content.splitlines()[:40])
+                preview = head_lines(ch.content, 40)
                 sub = QtWidgets.QTreeWidgetItem(["…", "podgląd", ""]) 
                 item.addChild(sub)
                 sub.setToolTip(1, preview)
-        self.tree.expandAll()
+            items.append(item)
+        # jedno wstawienie i jeden layout/paint zamiast po każdym elemencie
+        self.tree.setUpdatesEnabled(False)
+        try:
+            self.tree.addTopLevelItems(items)
+            self.tree.expandToDepth(0)
+        finally:
+            self.tree.setUpdatesEnabled(True)
 
     def apply_changes(self):
         if not self._plan:
@@ -318,19 +600,33 @@ class PlanView(QtWidgets.QWidget):
             QtWidgets.QMessageBox.warning(self, APP_NAME, "Najpierw otwórz folder projektu.")
             return
         errors = []
+        # 1) walidacja całego planu (z kodowaniem treści), zanim dotkniemy dysku
+        ops: list[tuple[FileChange, Path, Optional[bytes]]] = []
         for ch in self._plan.changes:
             try:
                 target = clamp_to_root(Path(ch.path))
-                if ch.op == "delete":
-                    if target.exists():
-                        target.unlink()
-                elif ch.op in ("create", "update"):
+                data = None
+                if ch.op in ("create", "update"):
                     if ch.content is None:
                         raise ValueError("Brak 'content' dla create/update")
-                    target.parent.mkdir(parents=True, exist_ok=True)
-                    target.write_text(ch.content, encoding='utf-8')
-                else:
+                    data = ch.content.encode('utf-8')
+                elif ch.op != "delete":
                     raise ValueError(f"Nieznana operacja: {ch.op}")
+                ops.append((ch, target, data))
+            except Exception as e:
+                errors.append(f"{ch.op} {ch.path}: {e}")
+        # 2) zapisy/usunięcia w kolejności z planu; katalog nadrzędny tworzony
+        #    przy pierwszym zapisie do niego (po ewentualnym delete wcześniej w planie)
+        seen: set[Path] = set()
+        for ch, target, data in ops:
+            try:
+                if data is None:
+                    target.unlink(missing_ok=True)
+                else:
+                    if target.parent not in seen:
+                        target.parent.mkdir(parents=True, exist_ok=True)
+                        seen.add(target.parent)
+                    write_file(target, data)
             except Exception as e:
                 errors.append(f"{ch.op} {ch.path}: {e}")
         if errors:
@@ -388,6 +684,10 @@ class MainWindow(QtWidgets.QMainWindow):
         self.root_split.setStretchFactor(1, 3)
         self.root_split.setStretchFactor(2, 1)
 
+        # kolejne refresh_explorer() w krótkim odstępie -> jedno przeładowanie
+        self._refresh_timer = QtCore.QTimer(self, singleShot=True, interval=100)
+        self._refresh_timer.timeout.connect(self._do_refresh_explorer)
+
     def _build_menu(self):
         menubar = self.menuBar()
         file_m = menubar.addMenu("Plik")
@@ -424,13 +724,20 @@ class MainWindow(QtWidgets.QMainWindow):
         SAFE_ROOT = Path(root).resolve()
         self.fs_model.setRootPath(str(SAFE_ROOT))
         self.tree.setRootIndex(self.fs_model.index(str(SAFE_ROOT)))
+        self.chat.load_cache(SAFE_ROOT)
         self.statusBar().showMessage(f"Projekt: {SAFE_ROOT}")
 
     def refresh_explorer(self):
+        self._refresh_timer.start()
+
+    def _do_refresh_explorer(self):
+        # Bez setRootPath("") – to wymuszało pełny rescan drzewa. QFileSystemModel
+        # sam obserwuje wczytane katalogi (QFileSystemWatcher) i dociąga zmiany;
+        # tu tylko pilnujemy, żeby widok wskazywał na katalog projektu.
         if SAFE_ROOT:
-            self.fs_model.setRootPath("")  # wymuszenie odświeżenia
-            self.fs_model.setRootPath(str(SAFE_ROOT))
-            self.tree.setRootIndex(self.fs_model.index(str(SAFE_ROOT)))
+            root_idx = self.fs_model.index(str(SAFE_ROOT))
+            if self.tree.rootIndex() != root_idx:
+                self.tree.setRootIndex(root_idx)
 
     def on_tree_double_click(self, idx: QtCore.QModelIndex):
         path = self.fs_model.filePath(idx)
@@ -472,10 +779,16 @@ class MainWindow(QtWidgets.QMainWindow):
     def toggle_chat(self, checked: bool):
         self.chat.setVisible(checked)
 
+    def closeEvent(self, event: QtGui.QCloseEvent):
+        self.chat.save_cache()
+        super().closeEvent(event)
+
 # -----------------------------
 # Start
 # -----------------------------
 def main():
+    # import openai nakłada się na start Qt zamiast na pierwsze zapytanie
+    threading.Thread(target=_preload_ai, name="preload-ai", daemon=True).start()
     app = QtWidgets.QApplication(sys.argv)
     win = MainWindow()
     win.show()
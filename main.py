@@ -2,13 +2,25 @@ import sys, importlib
 from tkinter import Tk, Frame, Button, Label, messagebox
 from core.ui import center_window, padded
 
+HANDLERS = {}       # nazwa modułu -> open_window(root), wypełniane w main()
+_IMPORT_ERRORS = {}  # nazwa modułu -> wyjątek z importu przy starcie
+
 def _open(module: str, title: str, root):
     try:
-        importlib.import_module(module).open_window(root)
+        if module in _IMPORT_ERRORS:
+            raise _IMPORT_ERRORS[module]
+        HANDLERS[module](root)
     except Exception as e:
         messagebox.showerror(title, f"Moduł '{module}' nie jest jeszcze podpięty.\n\n{e}")
 
 def main():
+    # import raz przy starcie; błąd importu pokaże _open po kliknięciu
+    for module in ("cwu", "ai_assistant"):
+        try:
+            HANDLERS[module] = importlib.import_module(module).open_window
+        except Exception as e:
+            _IMPORT_ERRORS[module] = e
+
     root = Tk()
     root.title("Studio AI Dev")
     center_window(root, 640, 420)